@@ -15,54 +15,39 @@ if not data_path.exists():
     # Generate sample for two tickers AAA and BBB over 20 days
     dates = pd.date_range(start='2020-01-01', end='2020-02-05', freq='D')    
     tickers = ['AAA', 'BBB']
-    rows = []
-    for sec in tickers:
-        for dt in dates:
-            openp = np.random.uniform(10, 20)
-            high = openp * np.random.uniform(1.00, 1.05)
-            low = openp * np.random.uniform(0.95, 1.00)
-            close = np.random.uniform(low, high)
-            volume = np.random.randint(1000, 5000)
-            # Financial fields
-            net_profit_after = np.random.uniform(1e6, 5e6)
-            net_profit_z = net_profit_after * 0.1
-            con_npgrate_13w = np.random.uniform(-0.1, 0.3)
-            short_term_borrowing = np.random.uniform(0, 1e6)
-            short_term_bonds = np.random.uniform(0, 1e6)
-            non_current_liabilities_due_in_one_year = np.random.uniform(0, 1e6)
-            monetary_capital = np.random.uniform(1e6, 2e6)
-            trading_finan_assets = np.random.uniform(0, 5e5)
-            net_operating_cash = np.random.uniform(0, 5e5)
-            total_assets = np.random.uniform(5e6, 1e7)
-            total_liabilities = np.random.uniform(1e6, 3e6)
-            ROE_after = np.random.uniform(0, 0.2)
-            analyst_revision = np.random.uniform(-0.05, 0.05)
-            analyst_growth = np.random.uniform(-0.1, 0.2)
-            recent_issuance = np.random.choice([0, 1], p=[0.8, 0.2])
-            is_ST = np.random.choice([0, 1], p=[0.9, 0.1])
-            rows.append([
-                dt, sec, openp, high, low, close, volume,
-                net_profit_after, net_profit_z, con_npgrate_13w,
-                short_term_borrowing, short_term_bonds,
-                non_current_liabilities_due_in_one_year,
-                monetary_capital, trading_finan_assets,
-                net_operating_cash, total_assets, total_liabilities,
-                ROE_after, volume,
-                analyst_revision, analyst_growth,
-                recent_issuance, is_ST
-            ])
-
-    df_sample = pd.DataFrame(rows, columns=[
-        'datetime','sec_code','open','high','low','close','value',
-        'net_profit_after','net_profit_z','con_npgrate_13w',
-        'short_term_borrowing','short_term_bonds',
-        'non_current_liabilities_due_in_one_year',
-        'monetary_capital','trading_finan_assets',
-        'net_operating_cash','total_assets','total_liabilities',
-        'ROE_after','value',
-        'analyst_revision','analyst_growth',
-        'recent_issuance','is_ST'
-    ])
+    # One draw per column over all (ticker, date) rows, ticker-major
+    rng = np.random.default_rng(0)
+    N = len(tickers) * len(dates)
+    openp = rng.uniform(10, 20, N)
+    high = openp * rng.uniform(1.00, 1.05, N)
+    low = openp * rng.uniform(0.95, 1.00, N)
+    close = low + rng.random(N) * (high - low)
+    volume = rng.integers(1000, 5000, N)
+    # Financial fields
+    net_profit_after = rng.uniform(1e6, 5e6, N)
+    df_sample = pd.DataFrame({
+        'datetime': np.tile(dates, len(tickers)),
+        'sec_code': np.repeat(tickers, len(dates)),
+        'open': openp, 'high': high, 'low': low, 'close': close,
+        'volume': volume,
+        'net_profit_after': net_profit_after,
+        'net_profit_z': net_profit_after * 0.1,
+        'con_npgrate_13w': rng.uniform(-0.1, 0.3, N),
+        'short_term_borrowing': rng.uniform(0, 1e6, N),
+        'short_term_bonds': rng.uniform(0, 1e6, N),
+        'non_current_liabilities_due_in_one_year': rng.uniform(0, 1e6, N),
+        'monetary_capital': rng.uniform(1e6, 2e6, N),
+        'trading_finan_assets': rng.uniform(0, 5e5, N),
+        'net_operating_cash': rng.uniform(0, 5e5, N),
+        'total_assets': rng.uniform(5e6, 1e7, N),
+        'total_liabilities': rng.uniform(1e6, 3e6, N),
+        'ROE_after': rng.uniform(0, 0.2, N),
+        'value': volume * close,
+        'analyst_revision': rng.uniform(-0.05, 0.05, N),
+        'analyst_growth': rng.uniform(-0.1, 0.2, N),
+        'recent_issuance': rng.choice([0, 1], N, p=[0.8, 0.2]),
+        'is_ST': rng.choice([0, 1], N, p=[0.9, 0.1]),
+    })
     df_sample.to_csv(data_path, index=False)
     print(f"Sample data generated at {data_path}")
 
@@ -74,11 +59,20 @@ cerebro.addanalyzer(bt.analyzers.Returns, _name='rets')
 cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe', riskfreerate=0.0, annualize=True)
 cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
 
-# Load data feeds
-df = pd.read_csv(data_path, parse_dates=['datetime'])
-for sec in df['sec_code'].unique():
-    sub = df[df['sec_code'] == sec].set_index('datetime').sort_index()
-    data = PandasDataMore(dataname=sub)
+# Load data feeds, preferring a Parquet copy of the CSV while it is up to date
+parquet_path = data_path.with_suffix('.parquet')
+if parquet_path.exists() and parquet_path.stat().st_mtime >= data_path.stat().st_mtime:
+    df = pd.read_parquet(parquet_path)
+else:
+    df = pd.read_csv(data_path, parse_dates=['datetime'])
+    try:
+        df.to_parquet(parquet_path, index=False)
+    except ImportError:
+        # no Parquet engine (pyarrow/fastparquet) installed; keep using the CSV
+        pass
+df = df.sort_values(['sec_code', 'datetime']).set_index('datetime')
+for sec, sub in df.groupby('sec_code', sort=False):
+    data = PandasDataMore(dataname=sub.drop(columns=['sec_code']))
     cerebro.adddata(data, name=sec)
 
 # Broker settings
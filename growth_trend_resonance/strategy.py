@@ -8,11 +8,67 @@
 
 import backtrader as bt
 import backtrader.indicators as btind
+import math
 import numpy as np
-import collections
-from sklearn.linear_model import LinearRegression
 from datetime import timedelta
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+if njit is not None:
+    @njit
+    def _acc(buf, pinv_row):
+        return (buf * pinv_row).sum()
+else:
+    def _acc(buf, pinv_row):
+        return pinv_row.dot(buf)
+
+def _mtm_step(buf, pos, high, low, close, prev_close, k, state):
+    """
+    Write the masked return at buf[pos] and update state = [finite total,
+    NaN count, +inf count, -inf count]. Returns the window sum as sum() would:
+    NaN if the window holds a NaN or both infinities, else +/-inf if it holds one.
+    Plain Python on lists of floats; a numba version was slower per call.
+    """
+    new = close / prev_close - 1.0 if high / low < k else 0.0
+    old = buf[pos]
+    buf[pos] = new
+    if math.isfinite(old): state[0] -= old
+    else: state[1 if math.isnan(old) else (2 if old > 0 else 3)] -= 1
+    if math.isfinite(new): state[0] += new
+    else: state[1 if math.isnan(new) else (2 if new > 0 else 3)] += 1
+    if state[1] or (state[2] and state[3]): return math.nan
+    if state[2]: return math.inf
+    if state[3]: return -math.inf
+    return state[0]
+
+def _top_k(values, k):
+    """
+    Indices of the k largest values, largest first. Ties keep index order and
+    NaN comes last, as a stable descending sort would, so growing k extends the prefix.
+    """
+    k = min(k, len(values))
+    if k <= 0: return np.empty(0, dtype=int)
+    nan = np.isnan(values)
+    valid = np.flatnonzero(~nan)
+    if k > len(valid):
+        head = valid[np.argsort(-values[valid], kind='stable')]
+        return np.concatenate([head, np.flatnonzero(nan)[:k - len(valid)]])
+    v = values[valid]
+    t = np.partition(v, len(v) - k)[len(v) - k]
+    above = valid[v > t]
+    idx = np.concatenate([above, valid[v == t][:k - len(above)]])
+    return idx[np.argsort(-values[idx], kind='stable')]
+
+def _quantile(values, q):
+    """Linearly interpolated q-quantile, as np.percentile, from a partial sort."""
+    if np.isnan(values).any(): return np.nan
+    h = q * (len(values) - 1); lo = int(h); hi = min(lo + 1, len(values) - 1)
+    part = np.partition(values, [lo, hi])
+    return part[lo] + (h - lo) * (part[hi] - part[lo])
+
 class PandasDataMore(bt.feeds.PandasData):
     """
     Extend PandasData to include custom financial, analyst forecast, and issuance flag.
@@ -32,38 +88,42 @@ class AccIndex(bt.Indicator):
     lines = ('acc',)
     params = dict(window=8)
     def __init__(self):
-        self.history = collections.deque(maxlen=self.p.window)
+        w = self.p.window
+        x = np.arange(w, dtype=np.float64)
+        # design matrix is fixed: x^2, x and intercept; keep the x^2 row of its pseudoinverse
+        pinv = np.linalg.pinv(np.stack([x * x, x, np.ones(w)], axis=1))
+        # one rotated row per ring position, so next() is a single dot product
+        self._pinv_rolled = np.stack([np.roll(pinv[0], s) for s in range(w)])
+        self._buf = np.zeros(w)
+        self._idx = 0
     def next(self):
-        self.history.append(self.data.net_profit_z[0])
-        if len(self.history) == self.p.window:
-            X = np.arange(self.p.window).reshape(-1,1)
-            X_poly = np.hstack([X**2, X])
-            y = np.array(self.history)
-            model = LinearRegression().fit(X_poly, y)
-            self.lines.acc[0] = model.coef_[0]
+        w = self.p.window
+        self._buf[self._idx % w] = self.data.net_profit_z[0]
+        self._idx += 1
+        if self._idx >= w:
+            self.lines.acc[0] = _acc(self._buf, self._pinv_rolled[self._idx % w])
         else:
             self.lines.acc[0] = float('nan')
 
 class ImprovedMTM(bt.Indicator):
-    """Momentum sum when high/low < k over the given period, implemented via deque."""
+    """Momentum sum when high/low < k over the given period, kept as a running total."""
     lines = ('improved_mtm',)
     params = dict(k=1.08, period=20)
 
     def __init__(self):
-        # buffer last 'period' returns, masked by high/low ratio
-        self.history = collections.deque(maxlen=self.p.period)
+        # ring buffer of last 'period' returns, masked by high/low ratio
+        self._buf = [0.0] * self.p.period
+        self._pos = 0
+        # running total of finite returns plus NaN/+inf/-inf counts in the buffer,
+        # so a non-finite return drops out of the sum once it leaves the window
+        self._state = [0.0, 0, 0, 0]
 
     def next(self):
-        # calculate ratio and raw return
-        ratio = self.data.high[0] / self.data.low[0]
-        ret = (self.data.close[0] / self.data.close[-1] - 1)
-        # append masked return
-        if ratio < self.p.k:
-            self.history.append(ret)
-        else:
-            self.history.append(0.0)
-        # sum over history
-        self.lines.improved_mtm[0] = sum(self.history)
+        # masked return replaces the oldest one in the running total
+        d = self.data
+        self.lines.improved_mtm[0] = _mtm_step(self._buf, self._pos, d.high[0], d.low[0],
+                                               d.close[0], d.close[-1], self.p.k, self._state)
+        self._pos = (self._pos + 1) % self.p.period
 
 class SolvencyAbility(bt.Indicator):
     """(Cash - short_term_debt) / net_assets"""
@@ -93,68 +153,60 @@ class StockSelectStrategy(bt.Strategy):
     def __init__(self):
         self.last_rebalance = None
         self.target_pct = (1.0 - self.p.reserve) / self.p.selnum_final
+        # rebalance the day after these month*100+day dates: Jan 31, Apr 30, Jul 15, Aug 31, Oct 31
+        self._trigger_md = frozenset({131, 430, 715, 831, 1031})
+        # composite weights, in the column order of the factor matrix built in rebalance()
+        self._weights = np.array([
+            self.p.sel_TTM, self.p.sel_ACC, self.p.sel_NPAP, 1 - self.p.sel_Solvency,
+            self.p.sel_ROE, self.p.sel_daily_value, 1.0,
+            self.p.sel_analyst_rev, self.p.sel_analyst_growth,
+        ])
         self.acc = {d._name: AccIndex(d) for d in self.datas}
-        self.ttm = {d._name: (d.net_profit_after / d.net_profit_after(-1) - 1) for d in self.datas}
+        # TTM growth is read as npap - 1 in rebalance(), so only the ratio is a line
         self.npap = {d._name: (d.net_profit_after / d.net_profit_after(-1)) for d in self.datas}
         self.solv = {d._name: SolvencyAbility(d) for d in self.datas}
-        self.roe = {d._name: d.ROE_after for d in self.datas}
         self.vol = {d._name: btind.SimpleMovingAverage(d.value, period=5) for d in self.datas}
         self.mtm = {d._name: ImprovedMTM(d) for d in self.datas}
-        self.rev = {d._name: d.analyst_revision for d in self.datas}
-        self.gro = {d._name: d.analyst_growth for d in self.datas}
     def next(self):
         dt = self.datas[0].datetime.date(0)
         if self.last_rebalance == dt: return
-        target = {(1,31),(4,30),(7,15),(8,31),(10,31)}
-        if (dt - timedelta(days=1)).timetuple()[1:3] in target:
+        prev = dt - timedelta(days=1)
+        if prev.month*100 + prev.day in self._trigger_md:
             self.rebalance(); self.last_rebalance = dt
     def rebalance(self):
-        names = [d._name for d in self.datas]
+        # Factor matrix, one row per data: ttm, acc, npap, solv, roe, vol, mtm, rev, gro
+        F = np.empty((len(self.datas), 9))
+        flagged = np.empty(len(self.datas), dtype=bool)
+        for i, d in enumerate(self.datas):
+            n = d._name; npap = self.npap[n][0]
+            F[i] = (npap - 1, self.acc[n][0], npap, self.solv[n][0], d.ROE_after[0],
+                    self.vol[n][0], self.mtm[n][0], d.analyst_revision[0], d.analyst_growth[0])
+            flagged[i] = bool(d.recent_issuance[0] or d.is_ST[0])
         # 1. Base pool: top 1/3 TTM & top 50% acc>0
-        universe = names
-        ttm_vals = sorted([(n,self.ttm[n][0]) for n in universe], key=lambda x: x[1], reverse=True)
-        top_third = [n for n,_ in ttm_vals[:len(universe)//3]]
-        acc_vals = sorted([(n,self.acc[n][0]) for n in top_third if self.acc[n][0]>0], key=lambda x: x[1], reverse=True)
-        base = [n for n,_ in acc_vals[:len(acc_vals)//2]]
-        # 2. Hard filters including equity financing
-        raw_vols = [self.vol[n][0] for n in base]
-        vol_thresh = np.percentile(raw_vols, 90)
-        eligible = []
-        for n in base:
-            d = next(d for d in self.datas if d._name==n)
-            if self.npap[n][0]<=0.5 or self.solv[n][0]<=-1 or self.roe[n][0]<=0.01: continue
-            if self.vol[n][0]<vol_thresh or d.recent_issuance[0] or d.is_ST[0]: continue
-            eligible.append(n)
-        if len(eligible)<self.p.selnum_final: eligible = base
-        # normalize
-        def norm(arr):
-            v=[x for x in arr if not np.isnan(x)]; mn,mx=min(v),max(v)
-            return [50 if mn==mx else (x-mn)/(mx-mn)*100 for x in arr]
-        ttm_n = norm([self.ttm[n][0] for n in eligible])
-        acc_n = norm([self.acc[n][0] for n in eligible])
-        npap_n = norm([self.npap[n][0] for n in eligible])
-        solv_n = norm([self.solv[n][0] for n in eligible])
-        roe_n = norm([self.roe[n][0] for n in eligible])
-        vol_n = norm([self.vol[n][0] for n in eligible])
-        mtm_n = norm([self.mtm[n][0] for n in eligible])
-        rev_n = norm([self.rev[n][0] for n in eligible])
-        gro_n = norm([self.gro[n][0] for n in eligible])
+        top_third = _top_k(F[:, 0], len(F)//3)
+        acc = F[top_third, 1]; pos = acc > 0
+        base = top_third[pos][_top_k(acc[pos], pos.sum()//2)]
+        # 2. Hard filters including equity financing (skip tests negated, so NaN passes as before)
+        B = F[base]
+        vol_thresh = _quantile(B[:, 5], 0.9)
+        keep = ~((B[:, 2] <= 0.5) | (B[:, 3] <= -1) | (B[:, 4] <= 0.01)
+                 | (B[:, 5] < vol_thresh) | flagged[base])
+        eligible = base[keep] if keep.sum() >= self.p.selnum_final else base
+        # normalize: one column per factor, rescaled to 0-100
+        E = F[eligible]
+        mn, mx = np.nanmin(E, axis=0), np.nanmax(E, axis=0)
+        rng = mx - mn
+        norm_E = np.where(rng == 0, 50.0, (E - mn) / np.where(rng == 0, 1.0, rng) * 100.0)
         # score
-        comp=[]
-        for i,n in enumerate(eligible):
-            score=(self.p.sel_TTM*ttm_n[i]+self.p.sel_ACC*acc_n[i]+self.p.sel_NPAP*npap_n[i]
-                   +(1-self.p.sel_Solvency)*solv_n[i]+self.p.sel_ROE*roe_n[i]
-                   +self.p.sel_daily_value*vol_n[i]+mtm_n[i]
-                   +self.p.sel_analyst_rev*rev_n[i]+self.p.sel_analyst_growth*gro_n[i])
-            comp.append((n,score))
-        comp.sort(key=lambda x:x[1],reverse=True)
-        # exclude suspended/limit-up and top N
-        final=[]; i=0
-        while len(final)<self.p.selnum_final and i<len(comp):
-            n=comp[i][0]; d=next(d for d in self.datas if d._name==n)
-            if not(d.high[0]==d.low[0] or d.volume[0]==0): final.append(n)
+        scores = norm_E @ self._weights
+        # exclude suspended/limit-up and top N; widen the ranked head only if skips exhaust it
+        top = _top_k(scores, self.p.selnum_final)
+        final=set(); i=0
+        while len(final)<self.p.selnum_final and i<len(scores):
+            if i==len(top): top = _top_k(scores, 2*len(top))
+            j=eligible[top[i]]; d=self.datas[j]
+            if not(d.high[0]==d.low[0] or d.volume[0]==0): final.add(j)
             i+=1
         # orders
-        for d in self.datas:
-            self.order_target_percent(d, target=self.target_pct if d._name in final else 0.0)
-
+        for j, d in enumerate(self.datas):
+            self.order_target_percent(d, target=self.target_pct if j in final else 0.0)
@@ -4,32 +4,49 @@ import logging
 from datetime import datetime
 import backtrader as bt
 import backtrader.indicators as btind
-import backtrader.feeds as btfeeds
 import backtrader.indicators as btind
 import pandas as pd
+import talib
 import matplotlib.pyplot as plt
 
 
 
-from macd_kdj_atr.strategy import MACDKDJStrategy
+from macd_kdj_atr.strategy import MACDKDJStrategy, PandasDataInd
 
 cerebro = bt.Cerebro()
 st_date = pd.to_datetime('2020-01-01')
 ed_date = pd.to_datetime('2024-12-01')
-class GenericCSV(btfeeds.GenericCSVData):
-    params = (
-        ('fromdate', st_date),
-        ('todate', ed_date),
-        ('dtformat', ('%Y-%m-%d')),
-        ('datetime', 0),
-        ('high', 2),
-        ('low', 3),
-        ('open', 1),
-        ('close', 4),
-        ('volume', 5),
-        ('openinterest', -1),
-    )
-datafeed1 = GenericCSV(dataname='0981.HK.csv', fromdate=st_date, todate=ed_date)
+
+# Indicator periods; the strategy reads the precomputed lines, so these are
+# the only place the periods are set
+periods = dict(
+    macd=(12, 26, 9),  # fast EMA, slow EMA, signal EMA
+    kdj=(9, 3, 3),     # %K lookback, %K smoothing, %D smoothing
+    atr=15,            # moving average of True Range
+    rsi=14,
+    sma=10,
+    sma_vol=20,
+)
+
+# Load OHLCV (datetime, open, high, low, close, volume) and precompute all
+# indicators once with TA-Lib; the strategy reads them as feed lines.
+df = pd.read_csv('0981.HK.csv', index_col=0, parse_dates=True).iloc[:, :5]
+df.columns = ['open', 'high', 'low', 'close', 'volume']
+df = df.loc[st_date:ed_date].astype('float64')
+# MACD from separate EMAs: talib.MACD seeds the fast EMA on the slow lookback,
+# while each backtrader EMA seeds on its own SMA
+fast, slow, sig = periods['macd']
+df['macd'] = talib.EMA(df.close, fast) - talib.EMA(df.close, slow)
+df['signal'] = talib.EMA(df.macd, sig)
+df['hist'] = df['macd'] - df['signal']
+kp, kslow, dslow = periods['kdj']
+df['k'], df['d'] = talib.STOCH(df.high, df.low, df.close, kp, kslow, 0, dslow, 0)
+df['j'] = 3 * df['k'] - 2 * df['d']
+df['atr'] = talib.SMA(talib.TRANGE(df.high, df.low, df.close), periods['atr'])
+df['rsi'] = talib.RSI(df.close, periods['rsi'])
+df['sma10'] = talib.SMA(df.close, periods['sma'])
+df['sma_vol'] = talib.SMA(df.volume, periods['sma_vol'])
+datafeed1 = PandasDataInd(dataname=df, openinterest=None)
 cerebro.adddata(datafeed1, name='IF')
 cerebro.broker.setcash(1000000.0)
 cerebro.broker.set_slippage_perc(perc=0.0001) 
@@ -42,7 +59,6 @@ cerebro.broker.setcommission(commission=0.1, # handling fee of 0.1%
                              stocklike=False)
 
 cerebro.addstrategy(MACDKDJStrategy)
-cerebro.addanalyzer(bt.analyzers.PyFolio, _name='pyfolio')
 # Add analyzers before running the strategy
 cerebro.addanalyzer(bt.analyzers.PyFolio, _name='pyfolio')
 cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharperatio', 